@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+In-process example of call_tools_batch
+Runs several tool calls against the notes server module without a client
+"""
+
+import asyncio
+import os
+import sys
+
+os.environ.setdefault("NOTES_SEED", "0")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from notes_server import call_tools_batch
+
+async def test_batch():
+    """Create, read, list and delete notes in one batch"""
+    results = await call_tools_batch([
+        ("create_note", {"note_id": "batch-1", "content": "First batched note"}),
+        ("create_note", {"note_id": "batch-2", "content": "Second batched note"}),
+        ("create_note", {"note_id": 5, "content": "Rejected: non-string ID"}),
+        ("get_note", {"note_id": "batch-1"}),
+        ("list_notes", {}),
+        ("delete_note", {"note_id": "batch-2"}),
+        ("delete_note", {"note_id": "missing"}),
+        ("list_notes", {}),
+    ])
+    for i, result in enumerate(results, 1):
+        print(f"{i}: {result[0].text}")
+
+if __name__ == "__main__":
+    asyncio.run(test_batch())
@@ -5,32 +5,99 @@ Tests all functionality with proper MCP protocol
 """
 
 import asyncio
-import json
-import subprocess
+import asyncio.subprocess
+import logging
+import orjson
 import sys
 import os
 
+# Per-request tracing goes through logging so it costs nothing unless enabled
+# (set MCP_TEST_DEBUG=1 to see every request and response)
+logger = logging.getLogger("mcp.test")
+
+def _pretty(obj):
+    """Render a decoded JSON-RPC message for display"""
+    return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
+
 class MCPTestClient:
-    def __init__(self):
+    def __init__(self, length_prefixed=False):
+        self.length_prefixed = length_prefixed
         self.process = None
+        self.reader = None
+        self.writer = None
         self.request_id = 1
     
-    async def start_server(self):
-        """Start the MCP server process"""
+    async def start_server(self, socket_path=None):
+        """Start the MCP server process
+        
+        With socket_path the server is expected to listen on that UNIX socket
+        (NOTES_TRANSPORT=uds, inherited from our environment) and requests go
+        over the socket instead of the server's stdio.
+        """
         # Get the path to the server file
         server_path = os.path.join(os.path.dirname(__file__), '..', 'src', 'notes_server.py')
         
-        self.process = subprocess.Popen(
-            [sys.executable, server_path],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=0
+        # Leave preexec_fn, user/group, start_new_session and env unset so
+        # subprocess can launch via vfork/posix_spawn rather than a full fork
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, server_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+            close_fds=True,
+            limit=1 << 20
         )
         print("🚀 Server process started")
+        
+        if socket_path is None:
+            self.reader, self.writer = self.process.stdout, self.process.stdin
+        else:
+            self.reader, self.writer = await self._connect_socket(socket_path)
+            print(f"🔌 Connected to {socket_path}")
+    
+    async def _connect_socket(self, socket_path, attempts=100):
+        """Connect to the server's UNIX socket, waiting for it to start listening"""
+        for _ in range(attempts):
+            try:
+                return await asyncio.open_unix_connection(socket_path, limit=1 << 20)
+            except (FileNotFoundError, ConnectionRefusedError):
+                await asyncio.sleep(0.05)
+        raise ConnectionError(f"Server did not start listening on {socket_path}")
+    
+    def _frame(self, payload):
+        """Frame an encoded message for the wire"""
+        if self.length_prefixed:
+            return b"%08x" % len(payload) + payload
+        return payload + b"\n"
+    
+    async def read_frame(self):
+        """Read one raw message from the server; returns b"" once it closes"""
+        try:
+            if self.length_prefixed:
+                header = await self.reader.readexactly(8)
+                return await self.reader.readexactly(int(header, 16))
+            return await self.reader.readuntil(b"\n")
+        except asyncio.IncompleteReadError as e:
+            return b"" if self.length_prefixed else e.partial
+    
+    async def send_notification(self, method, params=None):
+        """Send a JSON-RPC notification (no id, no response expected)"""
+        notification = {
+            "jsonrpc": "2.0",
+            "method": method
+        }
+        if params:
+            notification["params"] = params
+        
+        notification_json = orjson.dumps(notification)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 Notifying: %s", method)
+            logger.debug("   Notification: %s", notification_json.decode())
+        
+        self.writer.write(self._frame(notification_json))
+        await self.writer.drain()
     
-    def send_request(self, method, params=None):
+    async def send_request(self, method, params=None):
         """Send a JSON-RPC request to the server"""
         request = {
             "jsonrpc": "2.0",
@@ -39,33 +106,92 @@ class MCPTestClient:
         }
         if params:
             request["params"] = params
+        self.request_id += 1
         
-        request_json = json.dumps(request)
-        print(f"📤 Sending: {method}")
-        print(f"   Request: {request_json}")
+        request_json = orjson.dumps(request)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📤 Sending: %s", method)
+            logger.debug("   Request: %s", request_json.decode())
         
-        self.process.stdin.write(request_json + "\n")
-        self.process.stdin.flush()
+        self.writer.write(self._frame(request_json))
+        await self.writer.drain()
         
         # Read response
         try:
-            response_line = self.process.stdout.readline()
+            response_line = await self.read_frame()
             if response_line.strip():
-                response = json.loads(response_line.strip())
-                print(f"📥 Response: {json.dumps(response, indent=2)}")
+                response = orjson.loads(response_line)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("📥 Response: %s", _pretty(response))
                 return response
             else:
-                print("📥 Empty response")
+                logger.debug("📥 Empty response")
                 return None
-        except json.JSONDecodeError as e:
-            print(f"❌ JSON decode error: {e}")
-            print(f"   Raw response: {response_line}")
+        except orjson.JSONDecodeError as e:
+            logger.error("❌ JSON decode error: %s", e)
+            logger.error("   Raw response: %r", response_line)
             return None
         except Exception as e:
-            print(f"❌ Error reading response: {e}")
+            logger.error("❌ Error reading response: %s", e)
             return None
+    
+    def submit(self, method, params=None):
+        """Queue a JSON-RPC request without waiting for its response
         
+        Only buffers the write; the bytes reach the server once the caller
+        awaits reap() (or the transport's buffer flushes on its own).
+        Returns the id assigned to the request.
+        """
+        request_id = self.request_id
+        request = {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": method
+        }
+        if params:
+            request["params"] = params
         self.request_id += 1
+        
+        self.writer.write(self._frame(orjson.dumps(request)))
+        return request_id
+    
+    async def reap(self, expected_ids):
+        """Flush submitted requests and read responses until all ids arrive
+        
+        Returns a dict mapping request id to response. Responses are matched
+        by id, so the server may answer out of order.
+        """
+        await self.writer.drain()
+        
+        pending = set(expected_ids)
+        responses = {}
+        while pending:
+            response_line = await self.read_frame()
+            if not response_line:
+                logger.error("❌ Server closed the connection with requests pending")
+                break
+            try:
+                response = orjson.loads(response_line)
+            except orjson.JSONDecodeError as e:
+                logger.error("❌ JSON decode error: %s", e)
+                logger.error("   Raw response: %r", response_line)
+                continue
+            response_id = response.get("id")
+            if response_id in pending:
+                pending.discard(response_id)
+                responses[response_id] = response
+        return responses
+    
+    async def send_batch(self, calls):
+        """Send several JSON-RPC requests in one write and collect the responses
+        
+        The MCP stdio transport is newline-delimited and does not accept JSON
+        arrays, so the batch is framed as consecutive lines written at once.
+        Returns a dict mapping request id to response.
+        """
+        logger.debug("📤 Sending batch of %d requests", len(calls))
+        ids = [self.submit(method, params) for method, params in calls]
+        return await self.reap(ids)
     
     async def test_full_workflow(self):
         """Test the complete MCP workflow"""
@@ -76,7 +202,7 @@ class MCPTestClient:
         try:
             # 1. Initialize the server
             print("\n1️⃣ INITIALIZING SERVER")
-            init_response = self.send_request("initialize", {
+            init_response = await self.send_request("initialize", {
                 "protocolVersion": "2024-11-05",
                 "capabilities": {},
                 "clientInfo": {
@@ -91,73 +217,61 @@ class MCPTestClient:
             
             # 2. Send initialized notification
             print("\n2️⃣ SENDING INITIALIZED NOTIFICATION")
-            self.send_request("notifications/initialized")
-            
-            # 3. List available tools
-            print("\n3️⃣ LISTING AVAILABLE TOOLS")
-            tools_response = self.send_request("tools/list")
+            await self.send_notification("notifications/initialized")
             
-            # 4. Test creating a note
-            print("\n4️⃣ CREATING A NOTE")
-            create_response = self.send_request("tools/call", {
-                "name": "create_note",
-                "arguments": {
-                    "note_id": "test-note-1",
-                    "content": "This is my first test note!"
-                }
-            })
-            
-            # 5. List all notes
-            print("\n5️⃣ LISTING ALL NOTES")
-            list_response = self.send_request("tools/call", {
-                "name": "list_notes",
-                "arguments": {}
-            })
+            # 3-11. Submit everything after the handshake, then reap once
+            steps = [
+                ("3️⃣ LISTING AVAILABLE TOOLS", "tools/list", None),
+                ("4️⃣ CREATING A NOTE", "tools/call", {
+                    "name": "create_note",
+                    "arguments": {
+                        "note_id": "test-note-1",
+                        "content": "This is my first test note!"
+                    }
+                }),
+                ("5️⃣ LISTING ALL NOTES", "tools/call", {
+                    "name": "list_notes",
+                    "arguments": {}
+                }),
+                ("6️⃣ RETRIEVING SPECIFIC NOTE", "tools/call", {
+                    "name": "get_note",
+                    "arguments": {
+                        "note_id": "test-note-1"
+                    }
+                }),
+                ("7️⃣ CREATING ANOTHER NOTE", "tools/call", {
+                    "name": "create_note",
+                    "arguments": {
+                        "note_id": "meeting-notes",
+                        "content": "Meeting with team tomorrow at 2 PM"
+                    }
+                }),
+                ("8️⃣ LISTING RESOURCES", "resources/list", None),
+                ("9️⃣ READING A RESOURCE", "resources/read", {
+                    "uri": "note://test-note-1"
+                }),
+                ("🔟 DELETING A NOTE", "tools/call", {
+                    "name": "delete_note",
+                    "arguments": {
+                        "note_id": "test-note-1"
+                    }
+                }),
+                ("1️⃣1️⃣ LISTING NOTES AFTER DELETION", "tools/call", {
+                    "name": "list_notes",
+                    "arguments": {}
+                }),
+            ]
             
-            # 6. Get specific note
-            print("\n6️⃣ RETRIEVING SPECIFIC NOTE")
-            get_response = self.send_request("tools/call", {
-                "name": "get_note",
-                "arguments": {
-                    "note_id": "test-note-1"
-                }
-            })
-            
-            # 7. Create another note
-            print("\n7️⃣ CREATING ANOTHER NOTE")
-            create_response2 = self.send_request("tools/call", {
-                "name": "create_note",
-                "arguments": {
-                    "note_id": "meeting-notes",
-                    "content": "Meeting with team tomorrow at 2 PM"
-                }
-            })
-            
-            # 8. List resources
-            print("\n8️⃣ LISTING RESOURCES")
-            resources_response = self.send_request("resources/list")
-            
-            # 9. Read a resource
-            print("\n9️⃣ READING A RESOURCE")
-            read_response = self.send_request("resources/read", {
-                "uri": "note://test-note-1"
-            })
-            
-            # 10. Delete a note
-            print("\n🔟 DELETING A NOTE")
-            delete_response = self.send_request("tools/call", {
-                "name": "delete_note",
-                "arguments": {
-                    "note_id": "test-note-1"
-                }
-            })
-            
-            # 11. List notes again to confirm deletion
-            print("\n1️⃣1️⃣ LISTING NOTES AFTER DELETION")
-            final_list_response = self.send_request("tools/call", {
-                "name": "list_notes",
-                "arguments": {}
-            })
+            print(f"📤 Submitting {len(steps)} requests")
+            ids = [self.submit(method, params) for _, method, params in steps]
+            responses = await self.reap(ids)
+            for request_id, (title, _, _) in zip(ids, steps):
+                print(f"\n{title}")
+                response = responses.get(request_id)
+                if response is None:
+                    print("📥 No response")
+                else:
+                    print(f"📥 Response: {_pretty(response)}")
             
             print("\n" + "=" * 50)
             print("✅ ALL TESTS COMPLETED!")
@@ -168,12 +282,22 @@ class MCPTestClient:
         finally:
             if self.process:
                 self.process.terminate()
+                await self.process.wait()
                 print("\n🛑 Server process terminated")
 
 async def main():
     """Main test function"""
-    client = MCPTestClient()
-    await client.start_server()
+    logging.basicConfig(
+        level=logging.DEBUG if os.environ.get("MCP_TEST_DEBUG") == "1" else logging.INFO,
+        format="%(message)s"
+    )
+    socket_path = None
+    length_prefixed = False
+    if os.environ.get("NOTES_TRANSPORT") == "uds":
+        socket_path = os.environ["NOTES_SOCKET"]
+        length_prefixed = os.environ.get("NOTES_FRAMING", "newline") == "length"
+    client = MCPTestClient(length_prefixed)
+    await client.start_server(socket_path)
     await asyncio.sleep(0.1)  # Give server time to start
     await client.test_full_workflow()
 
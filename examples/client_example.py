@@ -5,50 +5,85 @@ This demonstrates how to interact with the server programmatically
 """
 
 import asyncio
-import json
+import orjson
 import subprocess
 import sys
+from contextlib import asynccontextmanager
 
-async def test_server():
-    """Test the notes server functionality"""
-    
-    # Start the server process
+@asynccontextmanager
+async def server_process():
+    """Start the notes server once and yield it; it is terminated on exit"""
+    # Leave preexec_fn, user/group, start_new_session and env unset so
+    # subprocess can launch via vfork/posix_spawn rather than a full fork
     process = subprocess.Popen(
         [sys.executable, "src/notes_server.py"],
         stdin=subprocess.PIPE,
         stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-        text=True
+        stderr=subprocess.DEVNULL,
+        close_fds=True,
+        bufsize=1 << 16
     )
-    
     try:
-        # Initialize the server
-        init_request = {
-            "jsonrpc": "2.0",
-            "id": 1,
-            "method": "initialize",
-            "params": {
-                "protocolVersion": "2024-11-05",
-                "capabilities": {},
-                "clientInfo": {
-                    "name": "test-client",
-                    "version": "1.0.0"
-                }
-            }
-        }
-        
-        # Send initialize request
-        process.stdin.write(json.dumps(init_request) + "\n")
-        process.stdin.flush()
-        
-        # Read response
-        response = process.stdout.readline()
-        print("Server initialized:", response.strip())
-        
-    except Exception as e:
-        print(f"Error testing server: {e}")
+        yield process
     finally:
         process.terminate()
+        process.wait()
+
+def send_message(process, message):
+    """Write one JSON-RPC message; returns the response line for requests"""
+    process.stdin.write(orjson.dumps(message) + b"\n")
+    process.stdin.flush()
+    if "id" in message:
+        return process.stdout.readline()
+    return None
+
+async def test_initialize(process):
+    """Perform the MCP initialize handshake"""
+    # Initialize the server
+    init_request = {
+        "jsonrpc": "2.0",
+        "id": 1,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2024-11-05",
+            "capabilities": {},
+            "clientInfo": {
+                "name": "test-client",
+                "version": "1.0.0"
+            }
+        }
+    }
+    
+    # Send initialize request and read the response
+    response = send_message(process, init_request)
+    print("Server initialized:", response.decode().strip())
+    
+    send_message(process, {
+        "jsonrpc": "2.0",
+        "method": "notifications/initialized"
+    })
+
+async def test_list_notes(process):
+    """Call the list_notes tool on the already-initialized server"""
+    response = send_message(process, {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tools/call",
+        "params": {
+            "name": "list_notes",
+            "arguments": {}
+        }
+    })
+    print("Notes listed:", response.decode().strip())
+
+async def test_server():
+    """Test the notes server functionality against one shared process"""
+    async with server_process() as process:
+        try:
+            await test_initialize(process)
+            await test_list_notes(process)
+        except Exception as e:
+            print(f"Error testing server: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(test_server())
\ No newline at end of file
+    asyncio.run(test_server())
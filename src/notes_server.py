@@ -5,10 +5,33 @@ Provides basic note storage and retrieval functionality
 """
 
 import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
+import os
+import queue
+import signal
+import socket
+import sqlite3
+import stat
 import sys
-from typing import Dict, List, Any
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+from contextlib import asynccontextmanager
+from io import TextIOWrapper
+from types import MappingProxyType
+from typing import (
+    Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List,
+    Optional, Protocol, Tuple, Union
+)
+
+import anyio
+import anyio.lowlevel
+import anyio.to_thread
+import orjson
+from anyio.streams.memory import MemoryObjectReceiveStream, MemoryObjectSendStream
 from mcp.server.models import InitializationOptions
 from mcp.server import NotificationOptions, Server
 from mcp.types import (
@@ -20,20 +43,457 @@ from mcp.types import (
     LoggingLevel
 )
 import mcp.types as types
+from pydantic import AnyUrl
+from mcp.shared.message import SessionMessage
 
-# Set up logging
+# Set up logging. Per-request messages are DEBUG; the default level is
+# WARNING and can be changed with NOTES_LOG_LEVEL. Records only go onto a
+# queue on the calling thread; _log_listener does the file and stderr I/O
+# on its own thread. It runs from import, so importers of this module get
+# their records too, and stops at exit after draining the queue
+_LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+_log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter())  # The listener's handlers apply _LOG_FORMAT
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('mcp_notes_server.log'),
-        logging.StreamHandler(sys.stderr)  # Use stderr to avoid interfering with stdio
-    ]
+    level=os.environ.get("NOTES_LOG_LEVEL", "WARNING").upper(),
+    handlers=[_queue_handler]
 )
+_file_handler = logging.FileHandler('mcp_notes_server.log')
+_file_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+_stderr_handler = logging.StreamHandler(sys.stderr)  # Use stderr to avoid interfering with stdio
+_stderr_handler.setFormatter(logging.Formatter(_LOG_FORMAT))
+_log_listener = logging.handlers.QueueListener(_log_queue, _file_handler, _stderr_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
-# In-memory storage for notes with some sample data
-notes_storage: Dict[str, str] = {
+# Journal appends only need the data (and file size) on disk, not mtime
+_datasync = getattr(os, "fdatasync", os.fsync)
+_HAS_WRITEV = hasattr(os, "writev")
+
+class NoteItems(Protocol):
+    """Anything that yields (note_id, content) pairs: a dict or a notes store"""
+    
+    def items(self) -> Iterable[Tuple[str, str]]: ...
+
+
+# A queued journal record: encoded bytes, the caller's Future, and the
+# note ID with its new content (None for a delete)
+_JournalEntry = Tuple[bytes, Future, str, Optional[str]]
+
+class LocalDiskBackend:
+    """
+    Append-only journal that persists note writes to a single file.
+    
+    A background thread drains queued records in batches (up to
+    ``batch_size`` records or ``interval`` seconds, whichever comes first)
+    and commits each batch with one gathered write and one fdatasync on a
+    file descriptor opened once for the backend's lifetime. Callers get a
+    Future that resolves once their record is durable.
+    
+    The first batch that fails stops the journal: the file is truncated
+    back to the end of the last durable batch (so a torn record is not left
+    behind), and that batch's futures and every later one fail with the
+    original error. ``durable_notes()`` then returns exactly what the
+    journal holds, for callers to reset their in-memory state to.
+    """
+    
+    def __init__(self, path: str, batch_size: int = 16, interval: float = 0.001) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        self.interval = interval
+        self._queue: "queue.SimpleQueue[Optional[_JournalEntry]]" = queue.SimpleQueue()
+        self._fd: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._offset = 0
+        self._error: Optional[OSError] = None
+        # The notes as of the last durable batch; only the writer thread
+        # changes it, and it stops changing once _error is set
+        self._durable: Dict[str, str] = {}
+    
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+    
+    def load(self) -> Dict[str, str]:
+        """Replay the journal and return the resulting notes"""
+        notes: Dict[str, str] = {}
+        with open(self.path, "rb") as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    # A torn final record from a crash mid-write; skip it
+                    logger.warning("Skipping corrupt journal record in %s", self.path)
+                    continue
+                if record["op"] == "put":
+                    notes[record["id"]] = record["content"]
+                else:
+                    notes.pop(record["id"], None)
+        return notes
+    
+    def start(self, snapshot: NoteItems) -> None:
+        """Compact the journal down to ``snapshot`` and start the writer thread"""
+        self._durable = dict(snapshot.items())
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            self._offset = f.write(b"".join(self._put_record(k, v) for k, v in self._durable.items()))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._thread = threading.Thread(
+            target=self._run, args=(self._fd,), name="notes-journal", daemon=True
+        )
+        self._thread.start()
+    
+    def close(self) -> None:
+        """Flush outstanding records and stop the writer thread"""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+    
+    def put(self, note_id: str, content: str) -> Future:
+        return self._submit(self._put_record(note_id, content), note_id, content)
+    
+    def delete(self, note_id: str) -> Future:
+        return self._submit(orjson.dumps({"op": "del", "id": note_id}) + b"\n", note_id, None)
+    
+    def durable_notes(self) -> Dict[str, str]:
+        """The notes as of the last durable batch; final once a write has failed"""
+        return dict(self._durable)
+    
+    @staticmethod
+    def _put_record(note_id: str, content: str) -> bytes:
+        return orjson.dumps({"op": "put", "id": note_id, "content": content}) + b"\n"
+    
+    def _submit(self, record: bytes, note_id: str, content: Optional[str]) -> Future:
+        if self._thread is None:
+            raise RuntimeError("Journal writer is not running")
+        future: Future = Future()
+        self._queue.put((record, future, note_id, content))
+        return future
+    
+    def _run(self, fd: int) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(fd, batch)
+    
+    def _commit(self, fd: int, batch: List[_JournalEntry]) -> None:
+        records = [entry[0] for entry in batch]
+        try:
+            if self._error is not None:
+                raise self._error
+            self._write_all(fd, records)
+            _datasync(fd)
+        except OSError as e:
+            if self._error is None:
+                logger.error("Journal write failed, refusing further writes: %s", e)
+                self._error = e
+                self._discard_failed_batch(fd)
+            for entry in batch:
+                entry[1].set_exception(e)
+            return
+        self._offset += sum(map(len, records))
+        durable = self._durable
+        for _, _, note_id, content in batch:
+            if content is None:
+                durable.pop(note_id, None)
+            else:
+                durable[note_id] = content
+        for entry in batch:
+            entry[1].set_result(None)
+    
+    def _discard_failed_batch(self, fd: int) -> None:
+        """Cut the journal back to the end of the last durable batch"""
+        try:
+            os.ftruncate(fd, self._offset)
+            _datasync(fd)
+        except OSError as e:
+            # Replay skips a torn final record, so the journal still loads
+            logger.error("Journal truncation failed: %s", e)
+    
+    def _write_all(self, fd: int, records: List[bytes]) -> None:
+        # Gather-write the records straight from their own buffers; only a
+        # short write falls back to joining the remainder into one buffer
+        written = os.writev(fd, records) if _HAS_WRITEV else 0
+        if written == sum(map(len, records)):
+            return
+        data = memoryview(b"".join(records))[written:]
+        while data:
+            written = os.write(fd, data)
+            data = data[written:]
+
+
+class NotesStore:
+    """
+    In-memory note store.
+    
+    Content lives in a dict for O(1) lookup; IDs are also kept in a tight
+    list (with an ID -> position index) so listing walks a plain array.
+    Removal swaps the last ID into the freed slot, so it is O(1) but does
+    not preserve insertion order. ``version`` increases whenever the set of
+    IDs changes, letting callers cache views of it.
+    """
+    
+    def __init__(self) -> None:
+        self._contents: Dict[str, str] = {}
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = {}
+        self.version = 0
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def __contains__(self, note_id: object) -> bool:
+        return note_id in self._contents
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._ids)
+    
+    def ids(self) -> List[str]:
+        """The note IDs in listing order; callers must not mutate it"""
+        return self._ids
+    
+    def items(self) -> Iterator[Tuple[str, str]]:
+        contents = self._contents
+        return ((note_id, contents[note_id]) for note_id in self._ids)
+    
+    def get(self, note_id: str) -> Optional[str]:
+        return self._contents.get(note_id)
+    
+    def put(self, note_id: str, content: str) -> bool:
+        """Store a note; returns True if the ID is new"""
+        is_new = note_id not in self._contents
+        self._contents[note_id] = content
+        if is_new:
+            self._index[note_id] = len(self._ids)
+            self._ids.append(note_id)
+            self.version += 1
+        return is_new
+    
+    def update(self, notes: Dict[str, str]) -> None:
+        for note_id, content in notes.items():
+            self.put(note_id, content)
+    
+    def reset(self, notes: Dict[str, str]) -> None:
+        """Replace every note with ``notes``"""
+        self._contents = dict(notes)
+        self._ids = list(self._contents)
+        self._index = {note_id: i for i, note_id in enumerate(self._ids)}
+        self.version += 1
+    
+    def pop(self, note_id: str) -> Optional[str]:
+        """Remove a note; returns its content, or None if it did not exist"""
+        content = self._contents.pop(note_id, None)
+        if content is None:
+            return None
+        position = self._index.pop(note_id)
+        last = self._ids.pop()
+        if last != note_id:
+            self._ids[position] = last
+            self._index[last] = position
+        self.version += 1
+        return content
+
+
+class SqliteNotesStore:
+    """
+    Note store kept in an SQLite database, shareable between processes.
+    
+    Offers the same interface as NotesStore, so several server processes
+    can point at one database file. The database runs in WAL mode with
+    ``synchronous=NORMAL``. Reads are issued straight from the calling
+    (event-loop) thread, since WAL readers never wait on writers. Writes go
+    to a dedicated thread with its own connection. That connection waits up
+    to ``busy_timeout`` seconds for another process's write lock and runs
+    the WAL checkpoints (the only fsyncs under NORMAL), so neither blocks
+    the event loop. Writes commit in the order they were made.
+    
+    Until its write commits, a note's new content (or its deletion) is
+    served from an in-process overlay, so reads see writes in call order.
+    ``last_write`` is the Future of the latest put/pop and resolves once
+    that write has committed. A write that fails is dropped from the
+    overlay, so reads fall back to what the database holds, and its Future
+    carries the sqlite3.Error.
+    
+    ``version`` also moves when another connection commits, so cached
+    listings see their writes. Listing order is insertion order.
+    """
+    
+    def __init__(self, path: str, busy_timeout: float = 5.0) -> None:
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self._conn = sqlite3.connect(
+            path, timeout=busy_timeout, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notes (id TEXT PRIMARY KEY, content TEXT NOT NULL)"
+        )
+        self._local_version = 0
+        # note_id -> (Future of its latest uncommitted write, new content or
+        # None for a delete); _lock guards it and _local_version, which the
+        # writer thread also changes
+        self._overlay: Dict[str, Tuple[Future, Optional[str]]] = {}
+        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Optional[Tuple[str, Optional[str], Future]]]" = (
+            queue.SimpleQueue()
+        )
+        self.last_write: Future = Future()
+        self.last_write.set_result(None)
+        self._writer = threading.Thread(target=self._run_writes, name="notes-db-writer", daemon=True)
+        self._writer.start()
+    
+    @property
+    def version(self) -> int:
+        # data_version moves for commits made on any other connection,
+        # including this store's writer thread
+        (data_version,) = self._conn.execute("PRAGMA data_version").fetchone()
+        return self._local_version + data_version
+    
+    def close(self) -> None:
+        """Commit outstanding writes and stop the writer thread"""
+        self._queue.put(None)
+        self._writer.join()
+        self._conn.close()
+    
+    def __bool__(self) -> bool:
+        if self._overlay:
+            return bool(self.ids())
+        return self._conn.execute("SELECT 1 FROM notes LIMIT 1").fetchone() is not None
+    
+    def __len__(self) -> int:
+        if self._overlay:
+            return len(self.ids())
+        return self._conn.execute("SELECT count(*) FROM notes").fetchone()[0]
+    
+    def __contains__(self, note_id: object) -> bool:
+        return isinstance(note_id, str) and self.get(note_id) is not None
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids())
+    
+    def ids(self) -> List[str]:
+        """The note IDs in listing order"""
+        if not self._overlay:
+            return [row[0] for row in self._conn.execute("SELECT id FROM notes ORDER BY rowid")]
+        return [note_id for note_id, _ in self.items()]
+    
+    def items(self) -> Iterator[Tuple[str, str]]:
+        # Snapshot the overlay before reading, so a write that commits in
+        # between is seen in at least one of the two
+        with self._lock:
+            overlay = dict(self._overlay)
+        notes = dict(self._conn.execute("SELECT id, content FROM notes ORDER BY rowid").fetchall())
+        for note_id, (_, content) in overlay.items():
+            if content is None:
+                notes.pop(note_id, None)
+            else:
+                notes[note_id] = content
+        return iter(notes.items())
+    
+    def get(self, note_id: str) -> Optional[str]:
+        pending = self._overlay.get(note_id)
+        if pending is not None:
+            return pending[1]
+        row = self._conn.execute("SELECT content FROM notes WHERE id = ?", (note_id,)).fetchone()
+        return None if row is None else row[0]
+    
+    def put(self, note_id: str, content: str) -> bool:
+        """Store a note; returns True if the ID is new"""
+        is_new = self.get(note_id) is None
+        self._submit(note_id, content, is_new)
+        return is_new
+    
+    def update(self, notes: Dict[str, str]) -> None:
+        """Store several notes in one transaction, on the calling thread"""
+        with self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO notes (id, content) VALUES (?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET content = excluded.content",
+                notes.items()
+            )
+        with self._lock:
+            self._local_version += 1
+    
+    def pop(self, note_id: str) -> Optional[str]:
+        """Remove a note; returns its content, or None if it did not exist"""
+        content = self.get(note_id)
+        if content is not None:
+            self._submit(note_id, None, True)
+        return content
+    
+    def _submit(self, note_id: str, content: Optional[str], changes_ids: bool) -> None:
+        future: Future = Future()
+        with self._lock:
+            self._overlay[note_id] = (future, content)
+            if changes_ids:
+                self._local_version += 1
+        self._queue.put((note_id, content, future))
+        self.last_write = future
+    
+    def _run_writes(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, isolation_level=None)
+        try:
+            while (item := self._queue.get()) is not None:
+                note_id, content, future = item
+                try:
+                    if content is None:
+                        conn.execute("DELETE FROM notes WHERE id = ?", (note_id,))
+                    else:
+                        conn.execute(
+                            "INSERT INTO notes (id, content) VALUES (?, ?) "
+                            "ON CONFLICT (id) DO UPDATE SET content = excluded.content",
+                            (note_id, content)
+                        )
+                except sqlite3.Error as e:
+                    logger.error("Note write failed: %s", e)
+                    self._settle(note_id, future, failed=True)
+                    future.set_exception(e)
+                else:
+                    self._settle(note_id, future, failed=False)
+                    future.set_result(None)
+        finally:
+            conn.close()
+    
+    def _settle(self, note_id: str, future: Future, failed: bool) -> None:
+        """Drop a finished write from the overlay unless a later one superseded it"""
+        with self._lock:
+            pending = self._overlay.get(note_id)
+            if pending is not None and pending[0] is future:
+                del self._overlay[note_id]
+            if failed:
+                # Cached listings may include the change that never landed
+                self._local_version += 1
+
+
+# Sample notes loaded at startup unless NOTES_SEED=0
+_SEED_NOTES: Dict[str, str] = {
     "welcome": "Welcome to the MCP Notes Server! This is your first note.",
     "meeting-notes": """Team Meeting - June 10, 2025
 - Discussed Q2 goals
@@ -68,207 +528,632 @@ The architecture is elegant - resources for data, tools for actions.
 Looking forward to building more complex integrations."""
 }
 
+# Optional shared SQLite database; it persists every write itself, so it
+# takes the place of the journal when both are configured
+_db_path = os.environ.get("NOTES_DB")
+
+# Optional on-disk journal; without NOTES_JOURNAL notes live only in memory
+_journal_path = None if _db_path else os.environ.get("NOTES_JOURNAL")
+_backend: Optional[LocalDiskBackend] = LocalDiskBackend(_journal_path) if _journal_path else None
+
+# Storage for notes
+notes_storage: Union[NotesStore, SqliteNotesStore]
+if _db_path:
+    _db_is_new = not os.path.exists(_db_path)
+    notes_storage = SqliteNotesStore(_db_path)
+    if _db_is_new and os.environ.get("NOTES_SEED", "1") == "1":
+        notes_storage.update(_SEED_NOTES)
+else:
+    notes_storage = NotesStore()
+    if _backend is not None and _backend.exists():
+        notes_storage.update(_backend.load())
+    elif os.environ.get("NOTES_SEED", "1") == "1":
+        notes_storage.update(_SEED_NOTES)
+
+def _make_resource(note_id: str) -> types.Resource:
+    """Build the Resource entry advertised for a note"""
+    return types.Resource(
+        uri=AnyUrl(f"note://{note_id}"),
+        name=f"Note: {note_id}",
+        description=f"A note with ID {note_id}",
+        mimeType="text/plain"
+    )
+
+# Resource entries kept in step with notes_storage by create_note/delete_note
+_resources: Dict[str, types.Resource] = {
+    note_id: _make_resource(note_id) for note_id in notes_storage
+}
+
+# list_notes and list_resources responses, tagged with the notes_storage
+# version they were built from and rebuilt only once it changes
+_listing_cache: Tuple[int, List[types.TextContent]] = (-1, [])
+_resource_list_cache: Tuple[int, List[types.Resource]] = (-1, [])
+
+# get_note responses by note ID, each with the content it was built from.
+# An entry is dropped when its note is overwritten or deleted, and the cache
+# holds at most _GET_CACHE_MAX_CHARS characters of response text in at most
+# _GET_CACHE_MAX_ENTRIES entries, evicting the least recently used first
+_GET_CACHE_MAX_CHARS = 4 * 1024 * 1024
+_GET_CACHE_MAX_ENTRIES = 1024
+_get_cache: Dict[str, Tuple[str, List[types.TextContent]]] = {}
+_get_cache_chars = 0
+
+# Tool input schemas, shared read-only with the Tool definitions below
+_CREATE_SCHEMA = MappingProxyType({
+    "type": "object",
+    "properties": {
+        "note_id": {
+            "type": "string",
+            "description": "Unique identifier for the note"
+        },
+        "content": {
+            "type": "string",
+            "description": "The content of the note"
+        }
+    },
+    "required": ["note_id", "content"]
+})
+_GET_SCHEMA = MappingProxyType({
+    "type": "object",
+    "properties": {
+        "note_id": {
+            "type": "string",
+            "description": "The ID of the note to retrieve"
+        }
+    },
+    "required": ["note_id"]
+})
+_LIST_SCHEMA = MappingProxyType({
+    "type": "object",
+    "properties": {},
+    "required": []
+})
+_DELETE_SCHEMA = MappingProxyType({
+    "type": "object",
+    "properties": {
+        "note_id": {
+            "type": "string",
+            "description": "The ID of the note to delete"
+        }
+    },
+    "required": ["note_id"]
+})
+
+# Tool definitions are static, so build them once at import time. The
+# schema views are accepted at runtime (pydantic copies them into the dict
+# that inputSchema is declared as)
+_TOOLS: List[types.Tool] = [
+    types.Tool(
+        name="create_note",
+        description="Create a new note with an ID and content",
+        inputSchema=_CREATE_SCHEMA  # type: ignore[arg-type]
+    ),
+    types.Tool(
+        name="get_note",
+        description="Retrieve a note by its ID",
+        inputSchema=_GET_SCHEMA  # type: ignore[arg-type]
+    ),
+    types.Tool(
+        name="list_notes",
+        description="List all available notes",
+        inputSchema=_LIST_SCHEMA  # type: ignore[arg-type]
+    ),
+    types.Tool(
+        name="delete_note",
+        description="Delete a note by its ID",
+        inputSchema=_DELETE_SCHEMA  # type: ignore[arg-type]
+    )
+]
+
+def _reply(text: str) -> List[types.TextContent]:
+    """Wrap ``text`` as a single-item tool result"""
+    return [TextContent(type="text", text=text)]
+
+# Responses with fixed text are built once and shared across calls
+_ERR_CREATE_ARGS_REQUIRED = _reply("Error: Both note_id and content are required")
+_ERR_NOTE_ID_REQUIRED = _reply("Error: note_id is required")
+_ERR_CREATE_ARGS_TYPE = _reply("Error: note_id and content must be strings")
+_ERR_NOTE_ID_TYPE = _reply("Error: note_id must be a string")
+_NO_NOTES_AVAILABLE = _reply("No notes available")
+
+# Upper bound on a note's UTF-8 encoded content, so one oversized note
+# cannot make every later read of it allocate and copy megabytes
+_MAX_NOTE_BYTES = int(os.environ.get("NOTES_MAX_NOTE_BYTES", 64 * 1024))
+_ERR_NOTE_TOO_LARGE = _reply(f"Error: Note content exceeds {_MAX_NOTE_BYTES} bytes")
+
+# Transport tuning for NOTES_TRANSPORT=uds
+_SOCKET_BUFFER_SIZE = 256 * 1024
+_SOCKET_READ_LIMIT = 1 << 20
+_FRAME_HEADER_SIZE = 8
+# A frame header is the body length as exactly this many hex digits
+_HEX_DIGITS = frozenset(b"0123456789abcdefABCDEF")
+
+# Upper bound on how much output is held back to coalesce into one write
+_WRITE_COALESCE_LIMIT = 64 * 1024
+
 # Create server instance
-server = Server("notes-server")
+server: Server[Dict[str, Any]] = Server("notes-server")
 
 @server.list_resources()
 async def handle_list_resources() -> List[types.Resource]:
     """List all available note resources"""
-    logger.info("Handling list_resources request")
-    resources = []
-    for note_id in notes_storage.keys():
-        resources.append(
-            types.Resource(
-                uri=f"note://{note_id}",
-                name=f"Note: {note_id}",
-                description=f"A note with ID {note_id}",
-                mimeType="text/plain"
-            )
-        )
-    logger.info(f"Returning {len(resources)} resources")
+    global _resource_list_cache
+    logger.debug("Handling list_resources request")
+    version, resources = _resource_list_cache
+    current = notes_storage.version
+    if version != current:
+        # Notes created by another process sharing NOTES_DB have no entry yet
+        resources = [
+            _resources.get(note_id) or _make_resource(note_id) for note_id in notes_storage.ids()
+        ]
+        _resource_list_cache = (current, resources)
+    logger.debug("Returning %d resources", len(resources))
     return resources
 
 @server.read_resource()
-async def handle_read_resource(uri: str) -> str:
+async def handle_read_resource(uri: AnyUrl) -> str:
     """Read a specific note resource"""
-    logger.info(f"Handling read_resource request for URI: {uri}")
-    if not uri.startswith("note://"):
-        logger.error(f"Unsupported URI scheme: {uri}")
-        raise ValueError(f"Unsupported URI scheme: {uri}")
-    
-    note_id = uri[7:]  # Remove "note://" prefix
-    if note_id not in notes_storage:
-        logger.error(f"Note not found: {note_id}")
+    logger.debug("Handling read_resource request for URI: %s", uri)
+    uri_str = str(uri)
+    note_id = uri_str.removeprefix("note://")
+    if len(note_id) == len(uri_str):
+        logger.error("Unsupported URI scheme: %s", uri_str)
+        raise ValueError(f"Unsupported URI scheme: {uri_str}")
+    
+    content = notes_storage.get(note_id)
+    if content is None:
+        logger.error("Note not found: %s", note_id)
         raise ValueError(f"Note not found: {note_id}")
     
-    logger.info(f"Successfully retrieved note: {note_id}")
-    return notes_storage[note_id]
+    logger.debug("Successfully retrieved note: %s", note_id)
+    return content
 
 @server.list_tools()
 async def handle_list_tools() -> List[types.Tool]:
     """List available tools"""
-    logger.info("Handling list_tools request")
-    tools = [
-        types.Tool(
-            name="create_note",
-            description="Create a new note with an ID and content",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "note_id": {
-                        "type": "string",
-                        "description": "Unique identifier for the note"
-                    },
-                    "content": {
-                        "type": "string",
-                        "description": "The content of the note"
-                    }
-                },
-                "required": ["note_id", "content"]
-            }
-        ),
-        types.Tool(
-            name="get_note",
-            description="Retrieve a note by its ID",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "note_id": {
-                        "type": "string",
-                        "description": "The ID of the note to retrieve"
-                    }
-                },
-                "required": ["note_id"]
-            }
-        ),
-        types.Tool(
-            name="list_notes",
-            description="List all available notes",
-            inputSchema={
-                "type": "object",
-                "properties": {},
-                "required": []
-            }
-        ),
-        types.Tool(
-            name="delete_note",
-            description="Delete a note by its ID",
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "note_id": {
-                        "type": "string",
-                        "description": "The ID of the note to delete"
-                    }
-                },
-                "required": ["note_id"]
-            }
-        )
-    ]
-    logger.info(f"Returning {len(tools)} tools")
-    return tools
+    logger.debug("Handling list_tools request")
+    logger.debug("Returning %d tools", len(_TOOLS))
+    return _TOOLS
+
+def _err_not_found(note_id: str) -> List[types.TextContent]:
+    return _reply(f"Error: Note '{note_id}' not found")
+
+async def _journal_write(write: Future) -> None:
+    """
+    Wait for a journal write; if it fails, reset the notes to the journal.
+    
+    The journal stops at its first failed batch and fails every write after
+    it, so every call whose change was applied in memory but not made
+    durable ends up here. Resetting (rather than undoing each change) makes
+    memory match disk whatever order those calls resume in.
+    """
+    try:
+        await asyncio.wrap_future(write)
+    except OSError:
+        # The journal is only used with the in-memory store
+        if _backend is not None and isinstance(notes_storage, NotesStore):
+            _reset_notes(notes_storage, _backend.durable_notes())
+        raise
+
+def _reset_notes(store: NotesStore, notes: Dict[str, str]) -> None:
+    """Replace the notes and rebuild the views derived from them"""
+    global _get_cache_chars
+    store.reset(notes)
+    resources = {note_id: _resources.get(note_id) or _make_resource(note_id) for note_id in notes}
+    _resources.clear()
+    _resources.update(resources)
+    _get_cache.clear()
+    _get_cache_chars = 0
+
+async def _create_note(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Create or overwrite a note"""
+    get = arguments.get
+    note_id = get("note_id")
+    content = get("content")
+    
+    if not note_id or not content:
+        logger.error("Missing required arguments for create_note")
+        return _ERR_CREATE_ARGS_REQUIRED
+    if not isinstance(note_id, str) or not isinstance(content, str):
+        logger.error("Non-string arguments for create_note")
+        return _ERR_CREATE_ARGS_TYPE
+    
+    # A str is at most 4 UTF-8 bytes per character, so only content near the
+    # limit needs encoding to measure it
+    size = len(content)
+    if size > _MAX_NOTE_BYTES or (
+        size * 4 > _MAX_NOTE_BYTES and len(content.encode()) > _MAX_NOTE_BYTES
+    ):
+        logger.error("Note content too large for create_note")
+        return _ERR_NOTE_TOO_LARGE
+    
+    if notes_storage.put(note_id, content):
+        _resources[note_id] = _make_resource(note_id)
+    else:
+        _forget_get_response(note_id)
+    if _backend is not None:
+        await _journal_write(_backend.put(note_id, content))
+    elif isinstance(notes_storage, SqliteNotesStore):
+        await asyncio.wrap_future(notes_storage.last_write)
+    logger.debug("Successfully created note: %s", note_id)
+    return _reply(f"Note '{note_id}' created successfully")
+
+def _get_response(note_id: str, content: str) -> List[types.TextContent]:
+    """Return the get_note response for a note, reusing a cached one if current"""
+    global _get_cache_chars
+    entry = _get_cache.get(note_id)
+    # In memory the stored str is reused, so this is an identity check;
+    # with NOTES_DB it is one compare of the fetched text, with no hashing
+    if entry is not None and entry[0] == content:
+        # Move the entry to the end, so eviction drops the least recently used
+        _get_cache[note_id] = _get_cache.pop(note_id)
+        return entry[1]
+    
+    text = f"Note '{note_id}':\n{content}"
+    response = _reply(text)
+    _forget_get_response(note_id)
+    if len(text) <= _GET_CACHE_MAX_CHARS:
+        while _get_cache and (
+            _get_cache_chars + len(text) > _GET_CACHE_MAX_CHARS
+            or len(_get_cache) >= _GET_CACHE_MAX_ENTRIES
+        ):
+            _forget_get_response(next(iter(_get_cache)))
+        _get_cache[note_id] = (content, response)
+        _get_cache_chars += len(text)
+    return response
+
+def _forget_get_response(note_id: str) -> None:
+    global _get_cache_chars
+    entry = _get_cache.pop(note_id, None)
+    if entry is not None:
+        _get_cache_chars -= len(entry[1][0].text)
+
+async def _get_note(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Retrieve a note by ID"""
+    note_id = arguments.get("note_id")
+    
+    if not note_id:
+        logger.error("Missing note_id for get_note")
+        return _ERR_NOTE_ID_REQUIRED
+    if not isinstance(note_id, str):
+        logger.error("Non-string note_id for get_note")
+        return _ERR_NOTE_ID_TYPE
+    
+    content = notes_storage.get(note_id)
+    if content is None:
+        logger.error("Note not found: %s", note_id)
+        return _err_not_found(note_id)
+    
+    logger.debug("Successfully retrieved note: %s", note_id)
+    return _get_response(note_id, content)
+
+async def _list_notes(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """List the IDs of all notes"""
+    global _listing_cache
+    logger.debug("Listing all notes")
+    version, response = _listing_cache
+    current = notes_storage.version
+    if version != current:
+        note_ids = notes_storage.ids()
+        if note_ids:
+            note_list = "\n".join([f"- {note_id}" for note_id in note_ids])
+            response = _reply(f"Available notes:\n{note_list}")
+        else:
+            response = _NO_NOTES_AVAILABLE
+        _listing_cache = (current, response)
+    return response
+
+async def _delete_note(arguments: Dict[str, Any]) -> List[types.TextContent]:
+    """Delete a note by ID"""
+    note_id = arguments.get("note_id")
+    
+    if not note_id:
+        logger.error("Missing note_id for delete_note")
+        return _ERR_NOTE_ID_REQUIRED
+    if not isinstance(note_id, str):
+        logger.error("Non-string note_id for delete_note")
+        return _ERR_NOTE_ID_TYPE
+    
+    content = notes_storage.pop(note_id)
+    if content is None:
+        logger.error("Note not found for deletion: %s", note_id)
+        return _err_not_found(note_id)
+    
+    _resources.pop(note_id, None)
+    _forget_get_response(note_id)
+    if _backend is not None:
+        await _journal_write(_backend.delete(note_id))
+    elif isinstance(notes_storage, SqliteNotesStore):
+        await asyncio.wrap_future(notes_storage.last_write)
+    logger.debug("Successfully deleted note: %s", note_id)
+    return _reply(f"Note '{note_id}' deleted successfully")
+
+# Tool name -> handler; each handler receives the raw arguments dict
+_TOOL_HANDLERS: Dict[str, Callable[[Dict[str, Any]], Awaitable[List[types.TextContent]]]] = {
+    "create_note": _create_note,
+    "get_note": _get_note,
+    "list_notes": _list_notes,
+    "delete_note": _delete_note,
+}
 
 @server.call_tool()
 async def handle_call_tool(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
     """Handle tool calls"""
-    logger.info(f"Handling call_tool request: {name} with arguments: {arguments}")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Handling call_tool request: %s with arguments: %r", name, arguments)
     
-    if name == "create_note":
-        note_id = arguments.get("note_id")
-        content = arguments.get("content")
-        
-        if not note_id or not content:
-            logger.error("Missing required arguments for create_note")
-            return [types.TextContent(
-                type="text",
-                text="Error: Both note_id and content are required"
-            )]
-        
-        notes_storage[note_id] = content
-        logger.info(f"Successfully created note: {note_id}")
-        return [types.TextContent(
-            type="text",
-            text=f"Note '{note_id}' created successfully"
-        )]
-    
-    elif name == "get_note":
-        note_id = arguments.get("note_id")
-        
-        if not note_id:
-            logger.error("Missing note_id for get_note")
-            return [types.TextContent(
-                type="text",
-                text="Error: note_id is required"
-            )]
-        
-        if note_id not in notes_storage:
-            logger.error(f"Note not found: {note_id}")
-            return [types.TextContent(
-                type="text",
-                text=f"Error: Note '{note_id}' not found"
-            )]
-        
-        logger.info(f"Successfully retrieved note: {note_id}")
-        return [types.TextContent(
-            type="text",
-            text=f"Note '{note_id}':\n{notes_storage[note_id]}"
-        )]
-    
-    elif name == "list_notes":
-        logger.info("Listing all notes")
-        if not notes_storage:
-            return [types.TextContent(
-                type="text",
-                text="No notes available"
-            )]
+    handler = _TOOL_HANDLERS.get(name)
+    if handler is None:
+        logger.error("Unknown tool called: %s", name)
+        return _reply(f"Error: Unknown tool '{name}'")
+    return await handler(arguments)
+
+async def call_tools_batch(
+    calls: List[Tuple[str, Dict[str, Any]]]
+) -> List[List[types.TextContent]]:
+    """
+    Run several tool calls concurrently and return their results in order.
+    
+    Each call goes through handle_call_tool. Handlers apply their in-memory
+    change before their first await, so calls take effect in list order;
+    only the waits (e.g. journal writes) overlap. A call that raises gets an
+    error result in its slot, as the MCP call_tool wrapper would give it,
+    so one failure does not discard the other results.
+    """
+    return list(await asyncio.gather(
+        *(_call_tool_isolated(name, arguments) for name, arguments in calls)
+    ))
+
+async def _call_tool_isolated(name: str, arguments: Dict[str, Any]) -> List[types.TextContent]:
+    try:
+        return await handle_call_tool(name, arguments)
+    except Exception as e:
+        logger.error("Tool call %s failed in batch: %s", name, e)
+        return _reply(f"Error: {e}")
+
+def _encode_frame(session_message: SessionMessage, length_prefixed: bool = False) -> bytes:
+    # Dumping to plain data and encoding with orjson is quicker than
+    # model_dump_json(), and gives bytes without a str.encode() copy
+    body = orjson.dumps(
+        session_message.message.model_dump(mode="json", by_alias=True, exclude_none=True)
+    )
+    if length_prefixed:
+        return b"%08x" % len(body) + body
+    return body + b"\n"
+
+async def _read_frame(reader: asyncio.StreamReader, length_prefixed: bool = False) -> Optional[bytes]:
+    """
+    Read one message body from ``reader``.
+    
+    Returns None at end of stream or when the peer resets the connection,
+    and also after a malformed length header, since the frame boundaries after it cannot be trusted; the
+    caller then closes the connection. A zero-length frame is returned as
+    b"" and fails message validation like any other bad body.
+    """
+    try:
+        if length_prefixed:
+            header = await reader.readexactly(_FRAME_HEADER_SIZE)
+            if not _HEX_DIGITS.issuperset(header):
+                logger.warning("Invalid frame header %r, closing connection", header)
+                return None
+            return await reader.readexactly(int(header, 16))
+        return await reader.readuntil(b"\n")
+    except asyncio.IncompleteReadError as e:
+        # A final unterminated line is still a message; a cut-off
+        # length-prefixed frame is not
+        return None if length_prefixed or not e.partial else e.partial
+    except ConnectionResetError:
+        return None
+
+async def _write_coalesced(
+    write_stream_reader: MemoryObjectReceiveStream[SessionMessage],
+    write: Callable[[bytes], Awaitable[None]],
+    length_prefixed: bool = False,
+) -> None:
+    """
+    Forward outgoing messages to ``write``, coalescing those queued together.
+    
+    After the first message arrives the writer yields for one event-loop
+    tick, then gathers every message already waiting (up to
+    _WRITE_COALESCE_LIMIT bytes) into a single buffer and writes it once.
+    """
+    async with write_stream_reader:
+        async for session_message in write_stream_reader:
+            buffer = bytearray(_encode_frame(session_message, length_prefixed))
+            await anyio.lowlevel.checkpoint()
+            while len(buffer) < _WRITE_COALESCE_LIMIT:
+                try:
+                    session_message = write_stream_reader.receive_nowait()
+                except (anyio.WouldBlock, anyio.EndOfStream):
+                    break
+                buffer += _encode_frame(session_message, length_prefixed)
+            await write(bytes(buffer))
+
+async def _forward_incoming(
+    read_stream_writer: MemoryObjectSendStream[SessionMessage | Exception],
+    frames: AsyncIterable[Union[str, bytes]],
+) -> None:
+    """Parse incoming frames and hand them to the server, as stdio_server does"""
+    try:
+        async with read_stream_writer:
+            async for frame in frames:
+                try:
+                    message = types.JSONRPCMessage.model_validate(orjson.loads(frame))
+                except Exception as exc:
+                    await read_stream_writer.send(exc)
+                    continue
+                
+                await read_stream_writer.send(SessionMessage(message))
+    except anyio.ClosedResourceError:
+        await anyio.lowlevel.checkpoint()
+
+@asynccontextmanager
+async def buffered_stdio_server() -> AsyncIterator[
+    Tuple[MemoryObjectReceiveStream[SessionMessage | Exception], MemoryObjectSendStream[SessionMessage]]
+]:
+    """
+    Server transport over stdin/stdout with coalesced writes.
+    
+    Reads the same way as mcp.server.stdio.stdio_server, but instead of a
+    write plus a flush per message (each a worker-thread hop), responses
+    queued together go to stdout's binary buffer and are flushed as one
+    write(2) per batch.
+    """
+    # Unbuffered, so the reader thread below holds no buffer lock that
+    # interpreter shutdown would wait on
+    stdin = TextIOWrapper(open(sys.stdin.fileno(), "rb", buffering=0, closefd=False), encoding="utf-8")
+    stdout = sys.stdout.buffer
+    
+    read_stream: MemoryObjectReceiveStream[SessionMessage | Exception]
+    read_stream_writer: MemoryObjectSendStream[SessionMessage | Exception]
+    
+    write_stream: MemoryObjectSendStream[SessionMessage]
+    write_stream_reader: MemoryObjectReceiveStream[SessionMessage]
+    
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    
+    def write_sync(data: bytes) -> None:
+        stdout.write(data)
+        stdout.flush()
+    
+    async def stdout_writer() -> None:
+        async def write(data: bytes) -> None:
+            await anyio.to_thread.run_sync(write_sync, data)
         
-        note_list = "\n".join([f"- {note_id}" for note_id in notes_storage.keys()])
-        return [types.TextContent(
-            type="text",
-            text=f"Available notes:\n{note_list}"
-        )]
-    
-    elif name == "delete_note":
-        note_id = arguments.get("note_id")
+        try:
+            await _write_coalesced(write_stream_reader, write)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
+    
+    async def stdin_lines() -> AsyncIterator[str]:
+        # Lines are read on a daemon thread rather than an anyio worker: a
+        # read blocked on an idle client must not keep the process alive
+        # after SIGTERM, which clients send without closing stdin first
+        loop = asyncio.get_running_loop()
+        lines: "asyncio.Queue[str]" = asyncio.Queue(maxsize=1)
         
-        if not note_id:
-            logger.error("Missing note_id for delete_note")
-            return [types.TextContent(
-                type="text",
-                text="Error: note_id is required"
-            )]
+        def read_lines() -> None:
+            try:
+                for line in stdin:
+                    asyncio.run_coroutine_threadsafe(lines.put(line), loop).result()
+                asyncio.run_coroutine_threadsafe(lines.put(""), loop).result()
+            except (RuntimeError, CancelledError):
+                pass  # The event loop shut down first
         
-        if note_id not in notes_storage:
-            logger.error(f"Note not found for deletion: {note_id}")
-            return [types.TextContent(
-                type="text",
-                text=f"Error: Note '{note_id}' not found"
-            )]
+        threading.Thread(target=read_lines, name="notes-stdin", daemon=True).start()
+        while line := await lines.get():
+            yield line
+    
+    async with anyio.create_task_group() as tg:
+        tg.start_soon(_forward_incoming, read_stream_writer, stdin_lines())
+        tg.start_soon(stdout_writer)
+        yield read_stream, write_stream
+
+def _remove_socket_file(path: str) -> None:
+    """Unlink the UNIX socket at ``path`` if present; refuse to remove anything else"""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} exists and is not a socket")
+    os.unlink(path)
+
+@asynccontextmanager
+async def unix_socket_server(path: str, length_prefixed: bool = False) -> AsyncIterator[
+    Tuple[MemoryObjectReceiveStream[SessionMessage | Exception], MemoryObjectSendStream[SessionMessage]]
+]:
+    """
+    Server transport over a UNIX-domain stream socket.
+    
+    Accepts a single client on ``path`` and exchanges JSON-RPC messages with
+    it, mirroring mcp.server.stdio.stdio_server. Messages are newline-delimited
+    by default; with ``length_prefixed`` each one is preceded by its length
+    as 8 hex digits.
+    """
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        _remove_socket_file(path)
+        listener.bind(path)
+        listener.listen(1)
+        listener.setblocking(False)
+        logger.info(f"Waiting for a client on {path}")
+        conn, _ = await asyncio.get_running_loop().sock_accept(listener)
+    finally:
+        listener.close()
+    
+    # Larger socket buffers than the default pipe size keep bursts of
+    # responses from stalling on a full buffer
+    conn.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER_SIZE)
+    conn.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER_SIZE)
+    reader, writer = await asyncio.open_unix_connection(sock=conn, limit=_SOCKET_READ_LIMIT)
+    
+    read_stream: MemoryObjectReceiveStream[SessionMessage | Exception]
+    read_stream_writer: MemoryObjectSendStream[SessionMessage | Exception]
+    
+    write_stream: MemoryObjectSendStream[SessionMessage]
+    write_stream_reader: MemoryObjectReceiveStream[SessionMessage]
+    
+    read_stream_writer, read_stream = anyio.create_memory_object_stream(0)
+    write_stream, write_stream_reader = anyio.create_memory_object_stream(0)
+    
+    async def socket_frames() -> AsyncIterator[bytes]:
+        while (frame := await _read_frame(reader, length_prefixed)) is not None:
+            yield frame
+    
+    async def socket_writer() -> None:
+        async def write(data: bytes) -> None:
+            writer.write(data)
+            await writer.drain()
         
-        del notes_storage[note_id]
-        logger.info(f"Successfully deleted note: {note_id}")
-        return [types.TextContent(
-            type="text",
-            text=f"Note '{note_id}' deleted successfully"
-        )]
+        try:
+            await _write_coalesced(write_stream_reader, write, length_prefixed)
+        except anyio.ClosedResourceError:
+            await anyio.lowlevel.checkpoint()
     
-    else:
-        logger.error(f"Unknown tool called: {name}")
-        return [types.TextContent(
-            type="text",
-            text=f"Error: Unknown tool '{name}'"
-        )]
+    try:
+        async with anyio.create_task_group() as tg:
+            tg.start_soon(_forward_incoming, read_stream_writer, socket_frames())
+            tg.start_soon(socket_writer)
+            yield read_stream, write_stream
+    finally:
+        writer.close()
+        _remove_socket_file(path)
 
-async def main():
+async def main() -> None:
+    # Clients stop stdio servers with SIGTERM; cancelling the main task
+    # lets the shutdown below run instead of dying mid-write
+    main_task = asyncio.current_task()
+    if main_task is not None:
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, main_task.cancel)
+        except NotImplementedError:
+            pass  # No loop signal handlers on Windows
+    
     logger.info("Starting MCP Notes Server...")
-    logger.info(f"Initial notes count: {len(notes_storage)}")
+    if logger.isEnabledFor(logging.INFO):
+        # len() is a COUNT(*) query with NOTES_DB
+        logger.info("Initial notes count: %d", len(notes_storage))
+    
+    if _backend is not None:
+        logger.info(f"Persisting notes to journal: {_backend.path}")
+        _backend.start(notes_storage)
     
     try:
-        # Import here to avoid issues if mcp package is not available
-        from mcp.server.stdio import stdio_server
+        transport_name = os.environ.get("NOTES_TRANSPORT", "stdio")
+        if transport_name == "uds":
+            socket_path = os.environ.get("NOTES_SOCKET")
+            if not socket_path:
+                raise ValueError("NOTES_SOCKET must be set when NOTES_TRANSPORT=uds")
+            logger.info(f"Setting up unix socket server on {socket_path}...")
+            length_prefixed = os.environ.get("NOTES_FRAMING", "newline") == "length"
+            transport = unix_socket_server(socket_path, length_prefixed)
+        else:
+            logger.info("Setting up stdio server...")
+            transport = buffered_stdio_server()
         
-        logger.info("Setting up stdio server...")
-        async with stdio_server() as (read_stream, write_stream):
+        async with transport as (read_stream, write_stream):
             logger.info("MCP Notes Server started successfully!")
             logger.info("Server is ready to handle requests")
             
@@ -288,6 +1173,10 @@ async def main():
         logger.error(f"Error starting server: {e}")
         raise
     finally:
+        if _backend is not None:
+            _backend.close()
+        if isinstance(notes_storage, SqliteNotesStore):
+            notes_storage.close()
         logger.info("MCP Notes Server shutting down")
 
 if __name__ == "__main__":
@@ -295,6 +1184,8 @@ if __name__ == "__main__":
         asyncio.run(main())
     except KeyboardInterrupt:
         logger.info("Server stopped by user")
+    except asyncio.CancelledError:
+        logger.info("Server stopped by SIGTERM")
     except Exception as e:
         logger.error(f"Fatal error: {e}")
         sys.exit(1)
\ No newline at end of file